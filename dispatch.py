@@ -0,0 +1,159 @@
+"""
+Module providing a bounded worker pool for the CPU-bound rendering stages.
+
+Tool handlers await rendering on a thread or process pool instead of running
+it on the MCP event loop. The pool admits at most max_workers running calls
+plus max_queue waiting ones, and rejects further calls immediately rather
+than letting them pile up. Every call has a deadline.
+"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+POOL_MODES = ["thread", "process"]
+
+
+class PoolSaturatedError(Exception):
+    """Raised when the pool and its queue are full"""
+
+
+class DispatchPool:
+    """Bounded thread or process pool with per-call deadlines and gauges"""
+
+    def __init__(self, mode="process", max_workers=2, max_queue=8, deadline=30):
+        """
+        Args:
+            mode (str): thread or process
+            max_workers (int): number of workers
+            max_queue (int): number of calls allowed to wait for a worker
+            deadline (float): seconds a call may take, queueing included
+        """
+        if mode not in POOL_MODES:
+            raise ValueError(f"Invalid pool mode. Valid pool modes are: {', '.join(POOL_MODES)}")
+
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.deadline = deadline
+        self.executor = self._new_executor()
+
+        # Calls submitted and not finished yet, including those past their deadline
+        # that still occupy a worker
+        self.in_flight = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.restarts = 0
+        self.lock = threading.Lock()
+
+    def _new_executor(self):
+        if self.mode == "process":
+            # Spawn rather than fork, as forking a process running threads is unsafe
+            context = multiprocessing.get_context("spawn")
+            return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="dispatch")
+
+    def _replace_executor(self, broken):
+        """
+        Replace a process pool broken by a dead worker (e.g. OOM-killed). Only
+        the first caller to notice a given broken pool rebuilds it.
+        """
+        with self.lock:
+            if self.executor is not broken:
+                return
+            self.executor = self._new_executor()
+            self.restarts += 1
+
+        # Outside the lock: cancelling the queued futures runs their _release callbacks
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self, future):
+        with self.lock:
+            self.in_flight -= 1
+
+    async def run(self, fn, *args):
+        """
+        Run fn(*args) on the pool
+
+        Args:
+            fn: picklable function when the pool runs processes
+            args: arguments of fn
+
+        Returns:
+            The return value of fn
+
+        Raises:
+            PoolSaturatedError: If all workers are busy and the queue is full
+            TimeoutError: If the call does not finish within the deadline
+            BrokenProcessPool: If a worker died while running the call
+        """
+        with self.lock:
+            if self.in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise PoolSaturatedError(
+                    f"Server busy: {self.in_flight} renders in progress or queued, please retry shortly")
+            self.in_flight += 1
+
+        # A pool found broken on submit is replaced and the call submitted once more
+        future = None
+        for _ in range(2):
+            with self.lock:
+                executor = self.executor
+                try:
+                    future = executor.submit(fn, *args)
+                    break
+                except BrokenProcessPool:
+                    pass
+                except Exception:
+                    self.in_flight -= 1
+                    raise
+            self._replace_executor(executor)
+
+        if future is None:
+            with self.lock:
+                self.in_flight -= 1
+            raise BrokenProcessPool("Rendering pool could not be restarted, please retry shortly")
+
+        # Futures dropped by a broken pool are failed or cancelled, which also releases them
+        future.add_done_callback(self._release)
+
+        try:
+            # A call still waiting in the queue is cancelled on timeout; a running
+            # one cannot be interrupted and keeps its worker until it finishes
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.deadline)
+        except asyncio.TimeoutError:
+            with self.lock:
+                self.timed_out += 1
+            raise TimeoutError(f"Rendering did not finish within {self.deadline} seconds")
+        except BrokenProcessPool as e:
+            self._replace_executor(executor)
+            raise BrokenProcessPool("A rendering worker died, the pool was restarted, please retry") from e
+
+    def gauges(self):
+        """
+        Current load of the pool
+
+        Returns:
+            dict: queue depth, busy workers, utilization and counters
+        """
+        with self.lock:
+            in_flight = self.in_flight
+            rejected = self.rejected
+            timed_out = self.timed_out
+            restarts = self.restarts
+
+        active_workers = min(in_flight, self.max_workers)
+
+        return {
+            "mode": self.mode,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "queue_depth": in_flight - active_workers,
+            "active_workers": active_workers,
+            "worker_utilization": active_workers / self.max_workers,
+            "rejected_total": rejected,
+            "timed_out_total": timed_out,
+            "restarts_total": restarts,
+        }
@@ -0,0 +1,402 @@
+"""
+Module providing a precomputed render farm.
+
+After each refresh of the CWA data, the forecast tables of all counties and the
+six satellite image products are rendered across a process pool and stored in
+a lookup table, so that a tool call only needs a dictionary read.
+"""
+import hashlib
+import json
+import multiprocessing
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from weather_fetcher import (
+    fetch_three_days_forecast,
+    fetch_one_week_forecast,
+    VALID_LOCATIONS
+)
+from weather_processor import (
+    process_three_days_data,
+    process_one_week_data,
+    get_three_days_plot,
+    get_one_week_ascii_table
+)
+from image2ascii import decode_image, colored_ascii_from_image, png_base64
+from resilience import resilient_get, stale_notice
+
+FORECAST_DAYS = ["three", "seven"]
+UI_MODES = ["terminal", "browser"]
+
+# Satellite and radar imagery: (region, wavelength) -> (url, radar)
+IMAGE_PRODUCTS = {
+    ("Taiwan", "infrared"): ("https://cwaopendata.s3.ap-northeast-1.amazonaws.com/Observation/O-C0042-002.jpg", False),
+    ("East Asia", "infrared"): ("https://cwaopendata.s3.ap-northeast-1.amazonaws.com/Observation/O-B0032-002.jpg", False),
+    ("Taiwan", "visible"): ("https://cwaopendata.s3.ap-northeast-1.amazonaws.com/Observation/O-C0042-008.jpg", False),
+    ("East Asia", "visible"): ("https://cwaopendata.s3.ap-northeast-1.amazonaws.com/Observation/O-B0032-001.jpg", False),
+    ("Taiwan", "radar"): ("https://cwaopendata.s3.ap-northeast-1.amazonaws.com/Observation/O-A0058-003.png", True),
+    ("East Asia", "radar"): ("https://cwaopendata.s3.ap-northeast-1.amazonaws.com/Observation/O-A0058-001.png", True),
+}
+
+# The imagery updates every 10 minutes
+REFRESH_INTERVAL = 600  # seconds
+# Entries not confirmed by a refresh for this long are no longer served
+MAX_ENTRY_AGE = 3 * REFRESH_INTERVAL  # seconds
+
+# Rendered bodies, keyed by ("forecast", location, num_days) or
+# ("image", region, wavelength, ui_mode). Each entry holds the body, the time
+# its data was fetched if it is stale (None if fresh), and the time of the last
+# refresh that confirmed it. Wrappers and stale notices are added on lookup.
+_table = {}
+# Fingerprints of the inputs behind each entry of the table
+_fingerprints = {}
+_lock = threading.Lock()
+
+
+def get_image_product(region, wavelength):
+    """
+    Resolve the tool arguments to an image product, defaulting to the
+    infrared image of Taiwan
+
+    Returns:
+        tuple: (region, wavelength) key of IMAGE_PRODUCTS
+    """
+    if wavelength not in ("infrared", "visible", "radar"):
+        return ("Taiwan", "infrared")
+
+    if region != "East Asia":
+        region = "Taiwan"
+
+    return (region, wavelength)
+
+
+def render_forecast_table(location, num_days, raw_data):
+    """
+    Render the forecast table of a county, the CPU-bound part of the forecast tool
+
+    Args:
+        location (str): county/city name
+        num_days (str): three or seven
+        raw_data (dict): raw weather data of the county
+
+    Returns:
+        str: Forecast table headed by the county name
+    """
+    if num_days == 'three':
+        processed_data = process_three_days_data(raw_data)
+        ascii_table = get_three_days_plot(processed_data)
+    else:
+        processed_data = process_one_week_data(raw_data)
+        ascii_table = get_one_week_ascii_table(processed_data)
+
+    return location + '\n' + ascii_table
+
+
+def format_forecast(ascii_table, ui_mode, stale_age=None):
+    """
+    Wrap a forecast table for the runtime environment
+
+    Args:
+        ascii_table (str): forecast table
+        ui_mode (str): terminal or browser
+        stale_age (float): age in seconds of data served from cache, None if fresh
+
+    Returns:
+        str: Preformatted forecast table
+    """
+    notice = stale_notice(stale_age)
+    if notice:
+        ascii_table = notice + '\n' + ascii_table
+
+    if ui_mode == "browser":
+        return(f"""<pre style="font-family: monospace; white-space: pre;">{ascii_table}</pre>""")
+
+    return f"```text\n\n{ascii_table}\n```"
+
+
+def render_forecast(location, num_days, ui_mode, raw_data):
+    """
+    Render the forecast tool output of a county
+
+    Args:
+        location (str): county/city name
+        num_days (str): three or seven
+        ui_mode (str): terminal or browser
+        raw_data (dict): raw weather data of the county
+
+    Returns:
+        str: Preformatted forecast table
+    """
+    ascii_table = render_forecast_table(location, num_days, raw_data)
+
+    return format_forecast(ascii_table, ui_mode, raw_data.get("stale_age"))
+
+
+def render_image_body(content, ui_mode, ascii_width, radar):
+    """
+    Convert the raw bytes of an image, the CPU-bound part of the image tool
+
+    Args:
+        content (bytes): raw image
+        ui_mode (str): terminal or browser
+        ascii_width (int): width of the ASCII rendering
+        radar (bool): reverse the ascii characters
+
+    Returns:
+        str: Base64-encoded PNG in browser mode, colored ASCII art otherwise
+    """
+    img = decode_image(content)
+
+    if ui_mode == 'browser':
+        return png_base64(img)
+
+    return colored_ascii_from_image(img, ascii_width, radar)
+
+
+def format_image(body, ui_mode, stale_age=None):
+    """
+    Wrap a converted image for the runtime environment
+
+    Args:
+        body (str): output of render_image_body
+        ui_mode (str): terminal or browser
+        stale_age (float): age in seconds of an image served from cache, None if fresh
+
+    Returns:
+        str: Preformatted weather image
+    """
+    notice = stale_notice(stale_age)
+
+    if ui_mode == 'browser':
+        if notice:
+            notice = f"<p>{notice}</p>"
+        return f'<div>{notice}<img src="data:image/png;base64,{body}" /></div>'
+
+    if notice:
+        notice += "\n"
+
+    return("```text\n" + notice + body + "\n```")
+
+
+def render_image(content, ui_mode, ascii_width, radar, stale_age=None):
+    """
+    Render the image tool output from the raw bytes of an image
+
+    Args:
+        content (bytes): raw image
+        ui_mode (str): terminal or browser
+        ascii_width (int): width of the ASCII rendering
+        radar (bool): reverse the ascii characters
+        stale_age (float): age in seconds of an image served from cache, None if fresh
+
+    Returns:
+        str: Preformatted weather image
+    """
+    body = render_image_body(content, ui_mode, ascii_width, radar)
+
+    return format_image(body, ui_mode, stale_age)
+
+
+def _lookup(key):
+    """
+    Return the body of an entry and its current stale age, or None if the
+    entry is missing or has not been confirmed by a recent refresh
+    """
+    with _lock:
+        entry = _table.get(key)
+
+    if entry is None or time.monotonic() - entry["refreshed_at"] > MAX_ENTRY_AGE:
+        return None
+
+    stale_age = None
+    if entry["stale_since"] is not None:
+        stale_age = time.time() - entry["stale_since"]
+
+    return entry["body"], stale_age
+
+
+def lookup_forecast(location, num_days, ui_mode):
+    """Return the prerendered forecast, or None if it is not rendered yet"""
+    entry = _lookup(("forecast", location, num_days))
+    if entry is None:
+        return None
+
+    return format_forecast(entry[0], ui_mode, entry[1])
+
+
+def lookup_image(region, wavelength, ui_mode):
+    """Return the prerendered image, or None if it is not rendered yet"""
+    entry = _lookup(("image", region, wavelength, ui_mode))
+    if entry is None:
+        return None
+
+    return format_image(entry[0], ui_mode, entry[1])
+
+
+def _fingerprint(payload):
+    """Fingerprint of a render input"""
+    if not isinstance(payload, bytes):
+        payload = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()
+
+
+def _stale_since(stale_age):
+    """Time the data was fetched if it is served from cache, None if fresh"""
+    if stale_age is None:
+        return None
+    return time.time() - stale_age
+
+
+def _split_by_location(data):
+    """
+    Split a forecast of all counties into single-county payloads shaped like
+    the response to a request with LocationName set
+    """
+    locations = data["records"]["Locations"][0]
+
+    for location in locations["Location"]:
+        payload = {"records": {"Locations": [dict(locations, Location=[location])]}}
+        yield location["LocationName"], payload
+
+
+def _collect_forecast_jobs(api_key):
+    """
+    Fetch the forecasts of all counties in bulk
+
+    Returns:
+        list: (key, fingerprint, stale since, render function, args) of every render job
+    """
+    jobs = []
+    fetchers = {"three": fetch_three_days_forecast, "seven": fetch_one_week_forecast}
+
+    for num_days in FORECAST_DAYS:
+        try:
+            data = fetchers[num_days](None, api_key)
+        except Exception as e:
+            print(f"Error prerendering {num_days}-day forecasts: {str(e)}", file=sys.stderr)
+            continue
+
+        stale_since = _stale_since(data.get("stale_age"))
+        for location, payload in _split_by_location(data):
+            if location not in VALID_LOCATIONS:
+                continue
+            key = ("forecast", location, num_days)
+            args = (location, num_days, payload)
+            jobs.append((key, _fingerprint(payload), stale_since, render_forecast_table, args))
+
+    return jobs
+
+
+def _collect_image_jobs(ascii_width):
+    """
+    Fetch the latest imagery
+
+    Returns:
+        list: (key, fingerprint, stale since, render function, args) of every render job
+    """
+    jobs = []
+
+    for (region, wavelength), (url, radar) in IMAGE_PRODUCTS.items():
+        try:
+            response = resilient_get(url)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"Error prerendering {wavelength} image of {region}: {str(e)}", file=sys.stderr)
+            continue
+
+        fingerprint = _fingerprint(response.content)
+        stale_since = _stale_since(response.stale_age)
+        for ui_mode in UI_MODES:
+            key = ("image", region, wavelength, ui_mode)
+            args = (response.content, ui_mode, ascii_width, radar)
+            jobs.append((key, fingerprint, stale_since, render_image_body, args))
+
+    return jobs
+
+
+def refresh(executor, api_key, ascii_width):
+    """
+    Fetch the latest CWA data and re-render every output whose input changed
+
+    Args:
+        executor (ProcessPoolExecutor): pool the rendering is fanned out to
+        api_key (str): CWA API KEY
+        ascii_width (int): width of the ASCII rendering of images
+
+    Returns:
+        int: Number of outputs rendered
+
+    Raises:
+        BrokenProcessPool: If a worker process died
+    """
+    jobs = _collect_forecast_jobs(api_key) + _collect_image_jobs(ascii_width)
+
+    futures = {}
+    for key, fingerprint, stale_since, render, args in jobs:
+        with _lock:
+            # Unchanged input: only confirm the entry and update its staleness
+            if _fingerprints.get(key) == fingerprint:
+                _table[key] = dict(_table[key], stale_since=stale_since, refreshed_at=time.monotonic())
+                continue
+        futures[executor.submit(render, *args)] = (key, fingerprint, stale_since)
+
+    for future in as_completed(futures):
+        key, fingerprint, stale_since = futures[future]
+        try:
+            body = future.result()
+        except BrokenProcessPool:
+            raise
+        except Exception as e:
+            print(f"Error rendering {key}: {str(e)}", file=sys.stderr)
+            continue
+
+        with _lock:
+            _table[key] = {"body": body, "stale_since": stale_since, "refreshed_at": time.monotonic()}
+            _fingerprints[key] = fingerprint
+
+    return len(futures)
+
+
+def start(api_key, ascii_width, max_workers=None, interval=REFRESH_INTERVAL):
+    """
+    Start the render farm in a background thread, refreshing every interval
+
+    Args:
+        api_key (str): CWA API KEY
+        ascii_width (int): width of the ASCII rendering of images
+        max_workers (int): number of rendering processes, defaults to the number of CPUs
+        interval (float): seconds between refreshes
+
+    Returns:
+        threading.Event: Set it to stop the render farm
+    """
+    stop = threading.Event()
+
+    def new_executor():
+        # Spawn rather than fork, as forking a process running threads is unsafe
+        context = multiprocessing.get_context("spawn")
+        return ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+
+    def run():
+        executor = new_executor()
+        try:
+            while not stop.is_set():
+                try:
+                    refresh(executor, api_key, ascii_width)
+                except BrokenProcessPool as e:
+                    # A dead worker (e.g. OOM-killed) breaks the whole pool, replace it
+                    print(f"Render farm pool broken, restarting it: {str(e)}", file=sys.stderr)
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    executor = new_executor()
+                except Exception as e:
+                    print(f"Error refreshing the render farm: {str(e)}", file=sys.stderr)
+                stop.wait(interval)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    threading.Thread(target=run, name="render-farm", daemon=True).start()
+
+    return stop
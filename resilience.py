@@ -0,0 +1,201 @@
+"""
+Module providing a resilience layer for HTTP requests to the CWA.
+
+Every GET is issued with connect/read deadlines and retried with jittered
+exponential backoff. Each endpoint has its own circuit breaker; while the
+breaker is open, or once retries are exhausted, the last good response for
+the same request is served from cache and marked as stale with its age.
+"""
+import copy
+import random
+import threading
+import time
+
+import requests
+
+# Deadlines in seconds: (connect, read)
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+
+# Retry policy for idempotent GETs
+MAX_RETRIES = 3
+CALL_BUDGET = 20  # seconds a call may spend on all attempts and backoff
+BACKOFF_BASE = 0.5  # seconds
+BACKOFF_CAP = 8  # seconds
+
+# Status codes worth retrying: rate limiting and server-side failures
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Circuit breaker policy
+FAILURE_THRESHOLD = 5  # consecutive failed attempts before the breaker opens
+RESET_TIMEOUT = 60  # seconds the breaker stays open before a trial request
+
+
+class CircuitOpenError(Exception):
+    """Raised when an endpoint's breaker is open and no cached response exists"""
+
+
+class CircuitBreaker:
+    """Per-endpoint circuit breaker with closed, open and half-open states"""
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def allow_request(self):
+        """
+        Whether a request may be sent. Once the reset timeout has elapsed the
+        breaker is half-open and lets a single trial request through.
+
+        Returns:
+            str: "closed" or "trial" if the request may be sent, None otherwise
+        """
+        with self.lock:
+            if self.opened_at is None:
+                return "closed"
+            if self.trial_in_flight or time.monotonic() - self.opened_at < self.reset_timeout:
+                return None
+            self.trial_in_flight = True
+            return "trial"
+
+    def is_open(self):
+        with self.lock:
+            return self.opened_at is not None
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            # A failed trial request re-opens the breaker for another full timeout
+            if self.trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+
+
+# Breakers keyed by endpoint url, last good responses keyed by (url, params)
+_breakers = {}
+_cache = {}
+_lock = threading.Lock()
+
+
+def _get_breaker(url):
+    with _lock:
+        if url not in _breakers:
+            _breakers[url] = CircuitBreaker()
+        return _breakers[url]
+
+
+def _cache_key(url, params):
+    return (url, tuple(sorted((params or {}).items())))
+
+
+def _backoff(attempt):
+    """Full-jitter exponential backoff delay for the given retry attempt"""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def _serve_stale(key, error):
+    """Return the cached response for key marked as stale, or raise error"""
+    with _lock:
+        cached = _cache.get(key)
+
+    if cached is None:
+        raise error
+
+    # Serve a copy, so that responses handed out earlier keep their own stale_age
+    fetched_at, response = cached
+    response = copy.copy(response)
+    response.stale_age = time.time() - fetched_at
+    return response
+
+
+def resilient_get(url, params=None):
+    """
+    GET a url with deadlines, retries and a circuit breaker
+
+    Args:
+        url (str): endpoint url
+        params (dict): query parameters
+
+    Returns:
+        requests.Response: The response, with a `stale_age` attribute set to
+        None when fresh, or to the age in seconds of a cached response served
+        because the endpoint is unavailable. Non-retryable error responses
+        (e.g. 401) are returned as is for the caller to handle.
+
+    Raises:
+        CircuitOpenError: If the breaker is open and nothing is cached
+        requests.exceptions.RequestException: If all attempts fail and nothing is cached
+    """
+    breaker = _get_breaker(url)
+    key = _cache_key(url, params)
+
+    state = breaker.allow_request()
+    if state is None:
+        return _serve_stale(key, CircuitOpenError(f"Circuit open for {url}"))
+
+    # A trial request gets a single attempt, and no call outlives its budget
+    attempts = 1 if state == "trial" else MAX_RETRIES + 1
+    deadline = time.monotonic() + CALL_BUDGET
+
+    error = requests.exceptions.Timeout(f"No attempt fit in the {CALL_BUDGET} s budget for {url}")
+    for attempt in range(attempts):
+        if attempt > 0:
+            delay = _backoff(attempt - 1)
+            if time.monotonic() + delay >= deadline:
+                break
+            time.sleep(delay)
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+
+        try:
+            response = requests.get(url, params=params,
+                                    timeout=(min(CONNECT_TIMEOUT, remaining), min(READ_TIMEOUT, remaining)))
+        except requests.exceptions.RequestException as e:
+            error = e
+        else:
+            if response.status_code not in RETRY_STATUS_CODES:
+                breaker.record_success()
+                response.stale_age = None
+                if response.status_code == 200:
+                    with _lock:
+                        _cache[key] = (time.time(), copy.copy(response))
+                return response
+
+            error = requests.exceptions.HTTPError(
+                f"API request failed, status code: {response.status_code}", response=response)
+
+        # Every failed attempt counts, and an open breaker ends the retries
+        breaker.record_failure()
+        if breaker.is_open():
+            break
+
+    return _serve_stale(key, error)
+
+
+def stale_notice(stale_age):
+    """
+    Human readable notice for a response served from cache
+
+    Args:
+        stale_age (float): age in seconds, or None if the response is fresh
+
+    Returns:
+        str: The notice, or an empty string if the response is fresh
+    """
+    if stale_age is None:
+        return ""
+
+    minutes = int(stale_age // 60)
+    return f"[stale] CWA is unavailable, showing data from {minutes} minutes ago"
@@ -1,5 +1,7 @@
 import os
 import argparse
+import asyncio
+import json
 
 from mcp.server.fastmcp import FastMCP
 
@@ -11,14 +13,11 @@ from weather_fetcher import (
     validate_api_key,
     VALID_LOCATIONS
 )
-from weather_processor import (
-    process_three_days_data, 
-    process_one_week_data, 
-    process_thirtySix_hours_data, 
-    get_three_days_plot, 
-    get_one_week_ascii_table
-)
-from image2ascii import image_to_colored_ascii, image_to_base64
+from weather_processor import process_thirtySix_hours_data, get_observation_summary
+from station_index import get_station_index
+from resilience import resilient_get, stale_notice
+from dispatch import DispatchPool, POOL_MODES
+import render_farm
 
 # Get API Key
 CWA_API_KEY = os.getenv("CWA_API_KEY")
@@ -28,14 +27,50 @@ parser.add_argument("-m","--ui_mode",
                     help="Runtime environment of the LLM: 'browser' or 'terminal'", type=str, default='terminal')
 parser.add_argument("-w","--ascii_width",
                     help="Width of the output text block: between 80 and 120 characters", type=int, default=120)
+parser.add_argument("-r","--render_workers",
+                    help="Number of processes prerendering all forecasts and images after each data refresh: 0 disables prerendering", type=int, default=2)
+parser.add_argument("-p","--pool_mode",
+                    help="Pool running the CPU-bound rendering of tool calls: 'thread' or 'process'", type=str, choices=POOL_MODES, default='process')
+parser.add_argument("--pool_workers",
+                    help="Number of workers rendering tool calls", type=int, default=2)
+parser.add_argument("--pool_queue",
+                    help="Number of tool calls allowed to wait for a worker before new calls are rejected", type=int, default=8)
+parser.add_argument("--pool_deadline",
+                    help="Seconds a tool call may spend waiting for and running its rendering", type=float, default=30)
 
 args = parser.parse_args()
 
 # Initialize MCP Server
 mcp = FastMCP("Taiwan Weather API")
 
+# Pool rendering tool calls off the event loop, created on first use so that
+# spawned worker processes importing this module do not create their own
+_pool = None
+
+
+def get_pool():
+    global _pool
+
+    if _pool is None:
+        _pool = DispatchPool(args.pool_mode, args.pool_workers, args.pool_queue, args.pool_deadline)
+
+    return _pool
+
+
+# Render farm, started on first use so that it also runs when the server is
+# loaded by a launcher such as `mcp run` instead of `python server.py`
+_render_farm = None
+
+
+def ensure_render_farm():
+    global _render_farm
+
+    if _render_farm is None and args.render_workers > 0 and CWA_API_KEY:
+        _render_farm = render_farm.start(CWA_API_KEY, args.ascii_width, args.render_workers)
+
+
 @mcp.tool()
-def get_weather_forecast(location_name: str, num_days: str) -> str:
+async def get_weather_forecast(location_name: str, num_days: str) -> str:
     """Get 3-day or 1-week weather forecast for the specified city/county in Taiwan
     
     Args:
@@ -59,38 +94,37 @@ def get_weather_forecast(location_name: str, num_days: str) -> str:
     # Validate location name
     location = get_valid_location(location_name)
 
-    if num_days == 'three':
-        # Get weather data
-        raw_data = fetch_three_days_forecast(location, CWA_API_KEY)
-    
-        # Filter the data
-        processed_data = process_three_days_data(raw_data)
-
-        # Generate ascii plot
-        ascii_table = get_three_days_plot(processed_data)
-    
-    else:
-        raw_data = fetch_one_week_forecast(location, CWA_API_KEY)
-
-        # Filter the data
-        processed_data = process_one_week_data(raw_data)
+    if num_days != 'three':
+        num_days = 'seven'
 
-        # Generate ascii table
-        ascii_table = get_one_week_ascii_table(processed_data)
+    ensure_render_farm()
 
-    ascii_table = location + '\n' + ascii_table
+    # Serve the prerendered table if the render farm has it
+    rendered = render_farm.lookup_forecast(location, num_days, args.ui_mode)
+    if rendered is not None:
+        return rendered
 
-    if args.ui_mode == "browser":
-            return(f"""<pre style="font-family: monospace; white-space: pre;">{ascii_table}</pre>""")
+    # Get weather data
+    if num_days == 'three':
+        raw_data = await asyncio.to_thread(fetch_three_days_forecast, location, CWA_API_KEY)
+    else:
+        raw_data = await asyncio.to_thread(fetch_one_week_forecast, location, CWA_API_KEY)
 
-    return f"```text\n\n{ascii_table}\n```"
+    # Filter the data and generate the ascii table on the worker pool
+    return await get_pool().run(render_farm.render_forecast, location, num_days, args.ui_mode, raw_data)
 
            
 @mcp.tool()
-def get_current_weather_conditions(location_name: str) -> str:
+async def get_current_weather_conditions(location_name: str, mode: str = "forecast", town_name: str = "") -> str:
     """Get the current weather of the specified city/county in Taiwan. 
 
     Args:
+        mode (str): forecast or observation
+            - forecast: summary of the 36-hour weather forecast for the current period
+            - observation: latest measurements of the weather stations nearest to the city/county or township
+
+        town_name (str): optional township/district in the city/county, only used in observation mode, for example "大安區" or "鳳林鎮"
+
         location_name (str): city/county, must be a valid Taiwan city/county name
 
         Valid city/county names include: 
@@ -102,22 +136,43 @@ def get_current_weather_conditions(location_name: str) -> str:
         So, when using this tool, convert location name into one of the above in tranditional Chinese: for example input "臺北" instead of "Taipei", "花蓮" instead of "Hualien", etc.
 
     Returns:
-        A summary of the current weather conditions, including probability of precipitation, outdoor thermal comfort index, and max and min of temperature, of the specified city in Taiwan.
+        A summary of the current weather conditions of the specified city in Taiwan.
+
+        - In forecast mode: probability of precipitation, outdoor thermal comfort index, and max and min of temperature.
+        - In observation mode: observed temperature, relative humidity, wind speed, precipitation today, and max and min of temperature today, averaged over the nearest reporting stations.
     """
     # Validate location name
     location = get_valid_location(location_name)
+
+    if mode == "observation":
+        # Resolve the nearest reporting stations from the station index
+        index = await asyncio.to_thread(get_station_index, CWA_API_KEY)
+        area, stations = index.nearest_stations(location, town_name)
+
+        # Aggregate the observations on the worker pool
+        weather_summary = await get_pool().run(get_observation_summary, area, stations)
+
+        notice = stale_notice(index.stale_age)
+        if notice:
+            weather_summary = notice + '\n' + weather_summary
+
+        return f"```\n{weather_summary}\n```"
  
     # Get weather data
-    raw_data = fetch_thirtySix_hours_forecast(location, CWA_API_KEY)
+    raw_data = await asyncio.to_thread(fetch_thirtySix_hours_forecast, location, CWA_API_KEY)
 
-    # Locate and transform the data
-    weather_summary = process_thirtySix_hours_data(raw_data)
+    # Locate and transform the data on the worker pool
+    weather_summary = await get_pool().run(process_thirtySix_hours_data, raw_data)
+
+    notice = stale_notice(raw_data.get("stale_age"))
+    if notice:
+        weather_summary = notice + '\n' + weather_summary
 
     return f"```\n{weather_summary}\n```"
 
 
 @mcp.tool()
-def get_current_weather_image(region: str, wavelength: str) -> str:
+async def get_current_weather_image(region: str, wavelength: str) -> str:
     """
     Get the satellite weather image of Taiwan or East Asia. The imagery updates very 10 minutes.
  
@@ -139,36 +194,29 @@ def get_current_weather_image(region: str, wavelength: str) -> str:
         - If running in 'browser' mode, the output is wrapped in HTML-safe base64-encoded <img> tags for direct rendering in web-based interfaces.
         The LLM does not need to infer the runtime environment. Instead, it should display the output according to the provided format. The tool ensures the output is pre-formatted for the intended environment.
     """
-    isRadar = False
-
-    # Determine the url based on the input parameters
+    # Determine the image product based on the input parameters
+    region, wavelength = render_farm.get_image_product(region, wavelength)
 
-    if wavelength == 'infrared':
-        url = "https://cwaopendata.s3.ap-northeast-1.amazonaws.com/Observation/O-C0042-002.jpg"
-        if region == 'East Asia':
-            url = "https://cwaopendata.s3.ap-northeast-1.amazonaws.com/Observation/O-B0032-002.jpg"
+    ensure_render_farm()
 
-    elif wavelength == 'visible':
-        url = "https://cwaopendata.s3.ap-northeast-1.amazonaws.com/Observation/O-C0042-008.jpg"
-        if region == 'East Asia':
-            url = "https://cwaopendata.s3.ap-northeast-1.amazonaws.com/Observation/O-B0032-001.jpg"
+    # Serve the prerendered image if the render farm has it
+    rendered = render_farm.lookup_image(region, wavelength, args.ui_mode)
+    if rendered is not None:
+        return rendered
 
-    elif wavelength == 'radar':
-        isRadar = True
-        url = "https://cwaopendata.s3.ap-northeast-1.amazonaws.com/Observation/O-A0058-003.png"
-        if region == 'East Asia':
-            url = "https://cwaopendata.s3.ap-northeast-1.amazonaws.com/Observation/O-A0058-001.png"
+    url, isRadar = render_farm.IMAGE_PRODUCTS[(region, wavelength)]
 
-    else:
-        url = "https://cwaopendata.s3.ap-northeast-1.amazonaws.com/Observation/O-C0042-002.jpg" # default is infrared image of Taiwan
+    response = await asyncio.to_thread(resilient_get, url)
+    response.raise_for_status()
 
-    if args.ui_mode == 'browser':
-        img_base64 = image_to_base64(url)
-        return f'<div><img src="data:image/png;base64,{img_base64}" /></div>'
+    # Convert the image on the worker pool
+    return await get_pool().run(render_farm.render_image, response.content, args.ui_mode, args.ascii_width, isRadar, response.stale_age)
 
-    ascii_block = image_to_colored_ascii(url, args.ascii_width, isRadar)
 
-    return("```text\n" + ascii_block + "\n```")
+@mcp.resource("stats://render_pool", mime_type="application/json")
+def get_render_pool_stats() -> str:
+    """Queue depth and worker utilization of the pool rendering tool calls"""
+    return json.dumps(get_pool().gauges())
 
 
 if __name__ == "__main__":
@@ -181,4 +229,7 @@ if __name__ == "__main__":
         print("CWA_API_Key is not valid!")
         exit(1)
 
+    # Prerender all forecasts and images after each data refresh
+    ensure_render_farm()
+
     mcp.run()
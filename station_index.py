@@ -0,0 +1,232 @@
+"""
+Module providing a spatial index over the CWA weather stations.
+
+The observations of all stations are fetched in one bulk request per dataset
+and indexed in a KD-tree, so that a county or township resolves to its
+nearest reporting stations without scanning every station per request.
+"""
+import heapq
+import math
+import re
+import threading
+import time
+
+from weather_fetcher import fetch_auto_station_observations, fetch_station_observations
+from weather_processor import process_observation_data
+
+# Observations are updated every 10 minutes
+OBSERVATION_TTL = 600  # seconds
+NEAREST_STATIONS = 3
+
+# Equirectangular projection to kilometres, accurate enough at Taiwan's latitude
+KM_PER_DEGREE_LAT = 110.57
+KM_PER_DEGREE_LON = 111.32 * math.cos(math.radians(23.7))
+
+
+def project(latitude, longitude):
+    """Project WGS84 coordinates to planar (x, y) in kilometres"""
+    return (longitude * KM_PER_DEGREE_LON, latitude * KM_PER_DEGREE_LAT)
+
+
+class KDTree:
+    """Two-dimensional KD-tree answering k-nearest-neighbour queries"""
+
+    def __init__(self, points):
+        """
+        Args:
+            points (list): (x, y, item) tuples
+        """
+        self.root = self._build(list(points), 0)
+
+    def _build(self, points, axis):
+        if not points:
+            return None
+
+        points.sort(key=lambda p: p[axis])
+        median = len(points) // 2
+
+        # node: (point, axis, left, right)
+        return (points[median], axis,
+                self._build(points[:median], 1 - axis),
+                self._build(points[median + 1:], 1 - axis))
+
+    def nearest(self, x, y, k):
+        """
+        Find the k points nearest to (x, y)
+
+        Returns:
+            list: (item, distance) tuples, nearest first
+        """
+        # Max-heap of the best k candidates as (-squared distance, counter, item)
+        best = []
+        counter = 0
+        stack = [self.root]
+
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+
+            point, axis, left, right = node
+            d2 = (point[0] - x) ** 2 + (point[1] - y) ** 2
+            counter += 1
+            if len(best) < k:
+                heapq.heappush(best, (-d2, counter, point[2]))
+            elif d2 < -best[0][0]:
+                heapq.heapreplace(best, (-d2, counter, point[2]))
+
+            diff = (x, y)[axis] - point[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+
+            # Visit the far side only if it may hold a closer point; push it
+            # first so that the near side is searched first
+            if len(best) < k or diff ** 2 < -best[0][0]:
+                stack.append(far)
+            stack.append(near)
+
+        return [(item, math.sqrt(-d2)) for d2, _, item in sorted(best, reverse=True)]
+
+
+class StationIndex:
+    """Nearest reporting stations of every county and township"""
+
+    def __init__(self, stations, stale_age=None):
+        """
+        Args:
+            stations (list): processed station observations
+            stale_age (float): age in seconds of observations served from cache, None if fresh
+        """
+        # Time the observations were fetched if served from cache, None if fresh
+        self.stale_since = None if stale_age is None else time.time() - stale_age
+
+        # Only stations currently reporting a temperature are worth aggregating.
+        # One tree per county and per township keeps a lookup inside the area,
+        # the tree of all stations is the fallback for an area with none.
+        points = {}
+        for s in stations:
+            if s["AirTemperature"] is None:
+                continue
+            point = (*project(s["Latitude"], s["Longitude"]), s)
+            for key in (None, (s["CountyName"], None), (s["CountyName"], s["TownName"])):
+                points.setdefault(key, []).append(point)
+
+        self.trees = {key: KDTree(area_points) for key, area_points in points.items()}
+
+        # Centroid of the stations of every county and township, computed once
+        sums = {}
+        for s in stations:
+            x, y = project(s["Latitude"], s["Longitude"])
+            for key in ((s["CountyName"], None), (s["CountyName"], s["TownName"])):
+                sx, sy, n = sums.get(key, (0, 0, 0))
+                sums[key] = (sx + x, sy + y, n + 1)
+
+        self.centroids = {key: (sx / n, sy / n) for key, (sx, sy, n) in sums.items()}
+
+    @property
+    def stale_age(self):
+        """Current age in seconds of observations served from cache, None if fresh"""
+        if self.stale_since is None:
+            return None
+        return time.time() - self.stale_since
+
+    def resolve_town(self, county, town):
+        """
+        Resolve a township name or prefix, e.g. "大安" to "大安區"
+
+        Raises:
+            ValueError: If no township or several townships of the county match
+        """
+        town = re.sub("台", "臺", town)
+        towns = [t for c, t in self.centroids if c == county and t]
+
+        if town in towns:
+            return town
+
+        matches = sorted(t for t in towns if t.startswith(town))
+        if not matches:
+            raise ValueError(f"Invalid township name {town} in {county}")
+        if len(matches) > 1:
+            raise ValueError(f"Ambiguous township name {town} in {county}, candidates are: {', '.join(matches)}")
+
+        return matches[0]
+
+    def nearest_stations(self, county, town=None, k=NEAREST_STATIONS):
+        """
+        Find the reporting stations nearest to a county or township, keeping
+        to the stations of the area. A township without reporting stations
+        falls back to its county, and a county to its neighbours.
+
+        Args:
+            county (str): county/city name
+            town (str): township name or prefix, or None for the whole county
+            k (int): number of stations
+
+        Returns:
+            tuple: The resolved area name, and a list of (station, distance in km)
+            tuples, nearest first
+
+        Raises:
+            ValueError: If the township is invalid or the county has no station
+        """
+        if town:
+            town = self.resolve_town(county, town)
+
+        area = (county, town or None)
+        if area not in self.centroids:
+            raise ValueError(f"No weather station found in {county}")
+
+        keys = [key for key in (area, (county, None), None) if key in self.trees]
+        if not keys:
+            raise ValueError("No weather station is reporting")
+
+        x, y = self.centroids[area]
+        return f"{county} {town or ''}".strip(), self.trees[keys[0]].nearest(x, y, k)
+
+
+_index = None
+_built_at = 0
+_lock = threading.Lock()
+
+
+def get_station_index(api_key):
+    """
+    Return the station index, rebuilding it from a bulk fetch of all stations
+    once the observations are older than OBSERVATION_TTL
+
+    Args:
+        api_key (str): CWA API KEY
+
+    Returns:
+        StationIndex: The station index
+
+    Raises:
+        Exception: If no observations could be fetched
+    """
+    global _index, _built_at
+
+    with _lock:
+        if _index is not None and time.monotonic() - _built_at < OBSERVATION_TTL:
+            return _index
+
+        stations = {}
+        stale_ages = []
+        errors = []
+        for fetch in (fetch_auto_station_observations, fetch_station_observations):
+            try:
+                data = fetch(api_key)
+            except Exception as e:
+                errors.append(str(e))
+                continue
+
+            for station in process_observation_data(data):
+                stations[station["StationId"]] = station
+            if data.get("stale_age") is not None:
+                stale_ages.append(data["stale_age"])
+
+        if not stations:
+            raise Exception("; ".join(errors))
+
+        _index = StationIndex(list(stations.values()), max(stale_ages, default=None))
+        _built_at = time.monotonic()
+
+        return _index
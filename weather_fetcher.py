@@ -2,7 +2,8 @@
 Module providing weather data fetching functionality.
 """
 import re
-import requests
+
+from resilience import resilient_get
 
 # List of valid county/city names
 VALID_LOCATIONS = ["宜蘭縣", "花蓮縣", "臺東縣", "澎湖縣", "金門縣", "連江縣",
@@ -14,16 +15,18 @@ VALID_LOCATIONS = ["宜蘭縣", "花蓮縣", "臺東縣", "澎湖縣", "金門
 THREE_DAYS_FORECAST_ENDPOINT = "https://opendata.cwa.gov.tw/api/v1/rest/datastore/F-D0047-089"
 ONE_WEEK_FORECAST_ENDPOINT = "https://opendata.cwa.gov.tw/api/v1/rest/datastore/F-D0047-091"
 THIRTYSIX_HOURS_FORECAST_ENDPOINT = "https://opendata.cwa.gov.tw/api/v1/rest/datastore/F-C0032-001"
+AUTO_STATION_OBSERVATION_ENDPOINT = "https://opendata.cwa.gov.tw/api/v1/rest/datastore/O-A0001-001"
+STATION_OBSERVATION_ENDPOINT = "https://opendata.cwa.gov.tw/api/v1/rest/datastore/O-A0003-001"
 
 def fetch_three_days_forecast(location, api_key):
     """Fetch 3-day weather forecast data from CWA API
     
     Args:
-        location: County/city name
+        location: County/city name, or None for all counties
         api_key: API key
         
     Returns:
-        dict: Raw weather data
+        dict: Raw weather data, with a "stale_age" key (seconds) if served from cache
         
     Raises:
         Exception: If API request fails or errors occur
@@ -35,9 +38,12 @@ def fetch_three_days_forecast(location, api_key):
     }
     
     try:
-        response = requests.get(url, params=params)
+        response = resilient_get(url, params=params)
         if response.status_code == 200:
-            return response.json()
+            data = response.json()
+            if response.stale_age is not None:
+                data["stale_age"] = response.stale_age
+            return data
         else:
             raise Exception(f"API request failed, status code: {response.status_code}")
     except Exception as e:
@@ -48,11 +54,11 @@ def fetch_one_week_forecast(location, api_key):
     """Fetch 1-week weather forecast data from CWA API
     
     Args:
-        location: County/city name
+        location: County/city name, or None for all counties
         api_key: API key
         
     Returns:
-        dict: Raw weather data
+        dict: Raw weather data, with a "stale_age" key (seconds) if served from cache
         
     Raises:
         Exception: If API request fails or errors occur
@@ -64,9 +70,12 @@ def fetch_one_week_forecast(location, api_key):
     }
     
     try:
-        response = requests.get(url, params=params)
+        response = resilient_get(url, params=params)
         if response.status_code == 200:
-            return response.json()
+            data = response.json()
+            if response.stale_age is not None:
+                data["stale_age"] = response.stale_age
+            return data
         else:
             raise Exception(f"API request failed, status code: {response.status_code}")
     except Exception as e:
@@ -81,7 +90,7 @@ def fetch_thirtySix_hours_forecast(location, api_key):
         api_key: API key
         
     Returns:
-        dict: Raw weather data
+        dict: Raw weather data, with a "stale_age" key (seconds) if served from cache
         
     Raises:
         Exception: If API request fails or errors occur
@@ -93,15 +102,78 @@ def fetch_thirtySix_hours_forecast(location, api_key):
     }
     
     try:
-        response = requests.get(url, params=params)
+        response = resilient_get(url, params=params)
         if response.status_code == 200:
-            return response.json()
+            data = response.json()
+            if response.stale_age is not None:
+                data["stale_age"] = response.stale_age
+            return data
         else:
             raise Exception(f"API request failed, status code: {response.status_code}")
     except Exception as e:
         raise Exception(f"Error fetching weather data: {str(e)}")
 
 
+def fetch_auto_station_observations(api_key):
+    """Fetch the current observations of all automatic weather stations from CWA API
+    
+    Args:
+        api_key: API key
+        
+    Returns:
+        dict: Raw observation data, with a "stale_age" key (seconds) if served from cache
+        
+    Raises:
+        Exception: If API request fails or errors occur
+    """
+    url = AUTO_STATION_OBSERVATION_ENDPOINT
+    params = {
+        "Authorization": api_key
+    }
+    
+    try:
+        response = resilient_get(url, params=params)
+        if response.status_code == 200:
+            data = response.json()
+            if response.stale_age is not None:
+                data["stale_age"] = response.stale_age
+            return data
+        else:
+            raise Exception(f"API request failed, status code: {response.status_code}")
+    except Exception as e:
+        raise Exception(f"Error fetching observation data: {str(e)}")
+
+
+def fetch_station_observations(api_key):
+    """Fetch the current observations of all manned weather stations from CWA API
+    
+    Args:
+        api_key: API key
+        
+    Returns:
+        dict: Raw observation data, with a "stale_age" key (seconds) if served from cache
+        
+    Raises:
+        Exception: If API request fails or errors occur
+    """
+    url = STATION_OBSERVATION_ENDPOINT
+    params = {
+        "Authorization": api_key
+    }
+    
+    try:
+        response = resilient_get(url, params=params)
+        if response.status_code == 200:
+            data = response.json()
+            if response.stale_age is not None:
+                data["stale_age"] = response.stale_age
+            return data
+        else:
+            raise Exception(f"API request failed, status code: {response.status_code}")
+    except Exception as e:
+        raise Exception(f"Error fetching observation data: {str(e)}")
+
+
 def get_valid_location(input_location):
     # 將訊息中的 "台" 替換為 "臺"
     corrected_location = re.sub("台", "臺", input_location)
@@ -136,7 +208,7 @@ def validate_api_key(api_key: str) -> bool:
             "LocationName": "臺北市"
         }
 
-        response = requests.get(test_url, params=params)
+        response = resilient_get(test_url, params=params)
 
         # HTTP status code
         if response.status_code == 200:
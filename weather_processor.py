@@ -321,3 +321,92 @@ def get_one_week_ascii_table(data):
     table_str = tabulate(df_all, headers=df_all.columns, tablefmt='simple')
 
     return(table_str)
+
+
+def _observed_value(value):
+    """Convert an observed value to float, None if missing (CWA marks missing values with -98, -99, -990, ...)"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+
+    return None if value <= -98 else value
+
+
+def process_observation_data(data):
+    """Filter and transform station observation data
+
+    Args:
+        data: Raw observation data
+
+    Returns:
+        list: One dictionary per station with its WGS84 coordinates and observed values
+
+    Raises:
+        Exception: If an error occurs during data processing
+    """
+    try:
+        result = []
+
+        for station in data["records"]["Station"]:
+            geo_info = station["GeoInfo"]
+            coordinates = next((c for c in geo_info["Coordinates"] if c["CoordinateName"] == "WGS84"), None)
+            # A station without WGS84 coordinates cannot be indexed, skip it
+            if coordinates is None:
+                continue
+            elements = station["WeatherElement"]
+
+            weather = elements.get("Weather")
+            if weather in (None, "", "-99"):
+                weather = None
+
+            daily_extreme = elements.get("DailyExtreme", {})
+
+            result.append({
+                "StationId": station["StationId"],
+                "StationName": station["StationName"],
+                "CountyName": geo_info["CountyName"],
+                "TownName": geo_info["TownName"],
+                "Latitude": float(coordinates["StationLatitude"]),
+                "Longitude": float(coordinates["StationLongitude"]),
+                "ObsTime": station["ObsTime"]["DateTime"],
+                "Weather": weather,
+                "AirTemperature": _observed_value(elements.get("AirTemperature")),
+                "RelativeHumidity": _observed_value(elements.get("RelativeHumidity")),
+                "WindSpeed": _observed_value(elements.get("WindSpeed")),
+                "Precipitation": _observed_value(elements.get("Now", {}).get("Precipitation")),
+                "DailyHigh": _observed_value(daily_extreme.get("DailyHigh", {}).get("TemperatureInfo", {}).get("AirTemperature")),
+                "DailyLow": _observed_value(daily_extreme.get("DailyLow", {}).get("TemperatureInfo", {}).get("AirTemperature")),
+            })
+
+        return result
+
+    except Exception as e:
+        raise Exception(f"Error during data filtering: {str(e)}")
+
+
+def get_observation_summary(location, stations):
+    """Aggregate the observations of the nearest stations into a summary
+
+    Args:
+        location: County/city name, followed by the township name if any
+        stations: list of (station, distance in km), nearest first; each station
+            is listed with the county and township it belongs to
+
+    Returns:
+        str: Summary of the observed weather conditions
+    """
+    def mean(key, unit):
+        values = [station[key] for station, _ in stations if station[key] is not None]
+        if not values:
+            return "n/a"
+        return f"{sum(values) / len(values):.1f} {unit}"
+
+    # The weather description is only reported by manned stations
+    weather = next((station["Weather"] for station, _ in stations if station["Weather"]), "n/a")
+    obs_time = max(station["ObsTime"] for station, _ in stations)
+    station_str = ", ".join(f"{station['StationName']} ({station['CountyName']}{station['TownName']}, {distance:.1f} km)" for station, distance in stations)
+
+    result_str = f'\nlocation: {location}\nobservation time: {obs_time}\nstations: {station_str}\nweather: {weather}\ntemperature: {mean("AirTemperature", "C")}\nrelative humidity: {mean("RelativeHumidity", "%")}\nwind speed: {mean("WindSpeed", "m/s")}\nprecipitation today: {mean("Precipitation", "mm")}\nmaximum temperature today: {mean("DailyHigh", "C")}\nminimum temperature today: {mean("DailyLow", "C")}\n'
+
+    return result_str